@@ -8,17 +8,48 @@ Downloads:
 3. Copernicus DEM tiles (via OpenTopography or manual download)
 
 Usage:
-    python scripts/00_download_data.py [--skip-dem] [--inkar-manual]
+    python scripts/00_download_data.py [--skip-dem] [--inkar-manual] [--quantize]
 """
 
+import os
 import sys
 import argparse
+import asyncio
+import io
+import queue
+import threading
 import zipfile
 import shutil
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
+import numpy as np
 import geopandas as gpd
+import rasterio
+import rasterio.errors
+import pyogrio
+from pyproj import CRS
+from pyogrio.errors import DataLayerError, DataSourceError, FieldError
+
+try:
+    import pyarrow  # noqa: F401
+    USE_ARROW = True
+except ImportError:
+    USE_ARROW = False
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    from stream_unzip import stream_unzip, UnzipError
+except ImportError:
+    stream_unzip = None
 
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_RAW = PROJECT_ROOT / "data_raw"
@@ -27,92 +58,506 @@ DATA_RAW.mkdir(parents=True, exist_ok=True)
 DEM_DIR = DATA_RAW / "copernicus_dem"
 DEM_DIR.mkdir(parents=True, exist_ok=True)
 
+# Number of DEM tiles fetched concurrently (network-bound, so threads suffice)
+DEM_WORKERS = 12
+# Parallel HTTP Range requests per DEM tile
+RANGE_PARTS = 4
+# Bytes per read/write when streaming downloads to disk
+CHUNK_SIZE = 1024 * 1024
+
+# Projected CRS used throughout the project (ETRS89 / UTM zone 32N)
+TARGET_CRS = CRS.from_epsg(25832)
+
+# Boundary attributes used downstream (AGS code variants, unit type, names)
+BOUNDARY_COLUMNS = ["AGS5", "ags", "AGS", "rs", "RS", "KREISE", "KREIS", "art", "GEN", "NAME", "name"]
+BOUNDARY_CODE_COLUMNS = ["AGS5", "ags", "AGS", "rs", "RS"]
+
+# SQLite settings for GeoPackage writes: no fsync, in-memory journal, 256 MB page cache
+GPKG_WRITE_OPTIONS = {
+    "OGR_SQLITE_SYNCHRONOUS": "OFF",
+    "OGR_SQLITE_JOURNAL": "MEMORY",
+    "OGR_SQLITE_CACHE": "256",
+}
+
+# Retry policy for transient server errors (shared by the requests session
+# and the aiohttp DEM path)
+HTTP_RETRIES = 5
+HTTP_BACKOFF = 0.5  # seconds; doubled after each retry
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Shared HTTP session: keep-alive reuses connections across all downloads
+# (pool sized so every tile worker can hold all its range connections).
+# Transient server errors are retried with exponential backoff on the same
+# session; other HTTP errors surface through raise_for_status().
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=DEM_WORKERS * RANGE_PARTS,
+    max_retries=Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET", "HEAD"],
+    ),
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+
+def _preallocate(fd, size):
+    """Reserve size bytes for fd up front so the file lands in few contiguous extents."""
+    if size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            # Filesystem without fallocate support - plain writes still work
+            pass
+
+
+def _part_path(path):
+    """Temporary path a download is written to until it completes."""
+    return path.with_name(path.name + ".part")
+
+
+def _etag_path(path):
+    """Sidecar file recording the server ETag a download was made from."""
+    return path.with_name(path.name + ".etag")
+
+
+def _finish_download(part_path, dest_path, etag=None):
+    """Move a completed download into place and record its ETag (if any)."""
+    os.replace(part_path, dest_path)
+    etag_file = _etag_path(dest_path)
+    if etag:
+        etag_file.write_text(etag)
+    elif etag_file.exists():
+        etag_file.unlink()
 
-def download_file(url, dest_path, description="Downloading", verbose=False):
+
+def is_up_to_date(url, path, session=_SESSION, timeout=10):
+    """
+    Check whether a previously downloaded file can be reused.
+    
+    Downloads only get their final name once complete, so an existing file is
+    never partial. If an ETag was recorded for it, the server is asked (HEAD)
+    whether the file has changed upstream; files without a recorded ETag
+    (e.g. placed manually) and servers that cannot be reached are trusted.
     """
-    Download a file with progress bar.
+    path = Path(path)
+    if not path.exists():
+        return False
+    
+    etag_file = _etag_path(path)
+    if not etag_file.exists():
+        return True
+    
+    try:
+        head = session.head(url, timeout=timeout, allow_redirects=True)
+    except requests.exceptions.RequestException:
+        return True
+    etag = head.headers.get("ETag")
+    return etag is None or etag == etag_file.read_text()
+
+
+def download_file(url, dest_path, description="Downloading", verbose=False, session=_SESSION,
+                  chunk_size=CHUNK_SIZE):
+    """
+    Download a file (with progress bar in verbose mode).
     
     Parameters:
     -----------
     url : str
         URL to download from
     dest_path : Path
-        Destination file path
+        Destination file path (caller must ensure the parent directory exists)
     description : str
         Description for progress bar
     verbose : bool
         Print detailed error information
+    session : requests.Session
+        HTTP session to use (defaults to the shared module session)
+    chunk_size : int
+        Bytes per read/write while streaming the response body
     """
     dest_path = Path(dest_path)
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = _part_path(dest_path)
     
     if verbose:
         print(f"   {description}: {url}")
     
     try:
-        response = requests.get(url, stream=True, timeout=60, allow_redirects=True)
-        
-        # Check status code
-        if response.status_code == 404:
-            if verbose:
-                print(f"   ✗ 404 Not Found")
-            return None
-        elif response.status_code == 401:
-            if verbose:
-                print(f"   ✗ 401 Unauthorized (authentication required)")
-            return None
-        elif response.status_code == 403:
-            if verbose:
-                print(f"   ✗ 403 Forbidden (access denied)")
-            return None
-        
-        response.raise_for_status()
+        with session.get(url, stream=True, timeout=60, allow_redirects=True) as response:
+            response.raise_for_status()
         
-        total_size = int(response.headers.get('content-length', 0))
+            total_size = int(response.headers.get('content-length', 0))
         
-        with open(dest_path, 'wb') as f, tqdm(
-            desc=dest_path.name,
-            total=total_size,
-            unit='B',
-            unit_scale=True,
-            unit_divisor=1024,
-            disable=not verbose and total_size == 0,
-        ) as bar:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    bar.update(len(chunk))
+            with open(part_path, 'wb', buffering=chunk_size) as f:
+                _preallocate(f.fileno(), total_size)
+                if verbose and total_size:
+                    with tqdm(
+                        desc=dest_path.name,
+                        total=total_size,
+                        unit='B',
+                        unit_scale=True,
+                        unit_divisor=1024,
+                    ) as bar:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                            bar.update(len(chunk))
+                else:
+                    # No progress display - keep the hot loop free of tqdm calls
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                # Drop any preallocated tail if fewer bytes arrived than announced
+                f.truncate()
+            _finish_download(part_path, dest_path, response.headers.get("ETag"))
         
-        if verbose:
-            print(f"   ✓ Saved to: {dest_path}")
-        return dest_path
+            if verbose:
+                print(f"   ✓ Saved to: {dest_path}")
+            return dest_path
         
     except requests.exceptions.RequestException as e:
         if verbose:
             print(f"   ✗ Download failed: {e}")
+        if part_path.exists():
+            part_path.unlink()
         return None
 
 
-def extract_zip(zip_path, extract_to, remove_zip=False):
-    """Extract ZIP file to directory."""
-    zip_path = Path(zip_path)
+def _ranged_get(session, url, start, end, fd):
+    """Fetch bytes start..end (inclusive) of url and write them at the same offset in fd."""
+    headers = {"Range": f"bytes={start}-{end}"}
+    with session.get(url, headers=headers, stream=True, timeout=60) as response:
+        if response.status_code != 206:
+            raise requests.exceptions.HTTPError(
+                f"Range request returned {response.status_code}", response=response
+            )
+        offset = start
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            os.pwrite(fd, chunk, offset)
+            offset += len(chunk)
+    if offset != end + 1:
+        raise requests.exceptions.ChunkedEncodingError(
+            f"Range {start}-{end} truncated at byte {offset}"
+        )
+
+
+def download_file_ranged(url, dest_path, description="Downloading", verbose=False,
+                         session=_SESSION, parts=RANGE_PARTS):
+    """
+    Download a file as several concurrent HTTP Range requests.
+    
+    Falls back to download_file() if the server does not support byte ranges,
+    the size is unknown, or any range request fails.
+    
+    Parameters:
+    -----------
+    url, dest_path, description, verbose, session :
+        As for download_file()
+    parts : int
+        Number of ranges fetched in parallel
+    """
+    dest_path = Path(dest_path)
+    
+    if parts < 2 or not hasattr(os, "pwrite"):
+        return download_file(url, dest_path, description, verbose, session)
+    
+    try:
+        head = session.head(url, timeout=60, allow_redirects=True)
+    except requests.exceptions.RequestException:
+        return download_file(url, dest_path, description, verbose, session)
+    
+    total_size = int(head.headers.get('content-length', 0))
+    if (head.status_code != 200
+            or head.headers.get('accept-ranges', '').lower() != 'bytes'
+            or total_size < parts):
+        return download_file(url, dest_path, description, verbose, session)
+    
+    if verbose:
+        print(f"   {description}: {url} ({parts} ranges)")
+    
+    # Split [0, total_size) into equal inclusive byte ranges
+    step = -(-total_size // parts)
+    ranges = [(start, min(start + step, total_size) - 1) for start in range(0, total_size, step)]
+    
+    part_path = _part_path(dest_path)
+    fd = os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    completed = False
+    try:
+        os.ftruncate(fd, total_size)
+        _preallocate(fd, total_size)
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [
+                executor.submit(_ranged_get, session, head.url, start, end, fd)
+                for start, end in ranges
+            ]
+            for future in futures:
+                future.result()
+        completed = True
+    except requests.exceptions.RequestException as e:
+        if verbose:
+            print(f"   ⚠ Ranged download failed ({e}), retrying as single stream")
+    finally:
+        os.close(fd)
+        # Any failure (network, full disk, short range body) leaves a
+        # preallocated file with zero-filled gaps - never keep it
+        if not completed:
+            part_path.unlink(missing_ok=True)
+    
+    if not completed:
+        return download_file(url, dest_path, description, verbose, session)
+    _finish_download(part_path, dest_path, head.headers.get("ETag"))
+    
+    if verbose:
+        print(f"   ✓ Saved to: {dest_path}")
+    return dest_path
+
+
+def find_available_url(urls, session=_SESSION, timeout=10):
+    """
+    Probe candidate URLs concurrently with HEAD requests.
+    
+    Returns the first URL in ``urls`` order that answered with a 2xx status
+    (so the most preferred source wins regardless of response timing), or
+    None if none did.
+    """
+    def probe(url):
+        try:
+            response = session.head(url, timeout=timeout, allow_redirects=True)
+        except requests.exceptions.RequestException:
+            return False
+        return 200 <= response.status_code < 300
+    
+    with ThreadPoolExecutor(max_workers=max(len(urls), 1)) as pool:
+        available = list(pool.map(probe, urls))
+    
+    for url, ok in zip(urls, available):
+        if ok:
+            return url
+    return None
+
+
+def prewarm_page_cache(path):
+    """
+    Hint the OS to keep a freshly written file in the page cache.
+    
+    Downstream steps (02_hillshade.py) read the DEM tiles right after
+    download, so asking for WILLNEED avoids re-reading them from disk.
+    No-op on platforms without posix_fadvise.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def _stream_extract_zip(response, extract_to):
+    """
+    Extract a ZIP archive from an HTTP response while it is still downloading.
+    
+    A producer thread pushes response chunks onto a bounded queue and this
+    thread decompresses entries from it as they arrive, so extraction time
+    overlaps the download instead of following it.
+    """
+    chunks = queue.Queue(maxsize=16)
+    done = object()
+    stop = threading.Event()
+    errors = []
+    
+    def produce():
+        try:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if stop.is_set():
+                    break
+                chunks.put(chunk)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            chunks.put(done)
+    
+    def consume():
+        while True:
+            chunk = chunks.get()
+            if chunk is done:
+                if errors:
+                    raise errors[0]
+                return
+            yield chunk
+    
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    root = extract_to.resolve()
+    created_dirs = {root}
+    try:
+        for raw_name, _size, unzipped_chunks in stream_unzip(consume()):
+            try:
+                name = raw_name.decode("utf-8")
+            except UnicodeDecodeError:
+                name = raw_name.decode("cp437")
+            target = (extract_to / name).resolve()
+            # Skip directory entries and anything escaping extract_to
+            if name.endswith("/") or root not in target.parents:
+                for _ in unzipped_chunks:
+                    pass
+                continue
+            if target.parent not in created_dirs:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                created_dirs.add(target.parent)
+            with open(target, "wb") as f:
+                for chunk in unzipped_chunks:
+                    f.write(chunk)
+    finally:
+        # Unblock the producer if extraction stopped early
+        stop.set()
+        while producer.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        producer.join()
+
+
+def download_and_extract_zip(url, extract_to, description="Downloading", verbose=False,
+                             session=_SESSION):
+    """
+    Download a ZIP archive and extract it to a directory.
+    
+    The archive itself is never written to disk, saving a full write and
+    re-read of a file that is only a transient container. With stream-unzip
+    installed, entries are extracted while the download is in progress;
+    otherwise the archive is buffered in memory and extracted afterwards.
+    
+    Parameters:
+    -----------
+    url : str
+        URL of the ZIP archive
+    extract_to : Path
+        Directory to extract into
+    description, verbose, session :
+        As for download_file()
+    """
     extract_to = Path(extract_to)
-    extract_to.mkdir(parents=True, exist_ok=True)
     
-    print(f"   Extracting {zip_path.name}...")
+    if verbose:
+        print(f"   {description}: {url}")
+    
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_to)
-        print(f"   ✓ Extracted to: {extract_to}")
-        
-        if remove_zip:
-            zip_path.unlink()
-            print(f"   ✓ Removed ZIP file")
-        
-        return extract_to
-    except zipfile.BadZipFile:
-        print(f"   ✗ Invalid ZIP file")
+        with session.get(url, stream=True, timeout=60, allow_redirects=True) as response:
+            response.raise_for_status()
+            
+            extract_to.mkdir(parents=True, exist_ok=True)
+            if stream_unzip is not None:
+                try:
+                    _stream_extract_zip(response, extract_to)
+                except UnzipError:
+                    print(f"   ✗ Invalid ZIP file")
+                    shutil.rmtree(extract_to, ignore_errors=True)
+                    return None
+                except Exception:
+                    # Never leave a half-extracted directory behind: the next
+                    # run would accept it as complete
+                    shutil.rmtree(extract_to, ignore_errors=True)
+                    raise
+            else:
+                buffer = io.BytesIO()
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    buffer.write(chunk)
+    except requests.exceptions.RequestException as e:
+        if verbose:
+            print(f"   ✗ Download failed: {e}")
         return None
+    
+    if stream_unzip is None:
+        buffer.seek(0)
+        try:
+            with zipfile.ZipFile(buffer) as zip_ref:
+                zip_ref.extractall(extract_to)
+        except zipfile.BadZipFile:
+            print(f"   ✗ Invalid ZIP file")
+            return None
+    
+    print(f"   ✓ Extracted to: {extract_to}")
+    return extract_to
+
+
+def read_boundaries(path):
+    """
+    Read a boundary layer with only the columns and rows needed downstream.
+    
+    Column selection and the Bayern filter (AGS starting with '09') are
+    pushed down to OGR, so discarded attributes and other Länder are never
+    loaded. Falls back to reading the full layer if the data product does
+    not have the expected fields.
+    """
+    try:
+        info = pyogrio.read_info(path)
+        fields = dict(zip(info["fields"], info["dtypes"]))
+        columns = [col for col in BOUNDARY_COLUMNS if col in fields]
+        # String codes only - numeric AGS values have lost their leading zero
+        code_col = next(
+            (col for col in BOUNDARY_CODE_COLUMNS if fields.get(col) == "object"), None
+        )
+        where = f"\"{code_col}\" LIKE '09%'" if code_col else None
+        
+        gdf = pyogrio.read_dataframe(
+            path, columns=columns or None, where=where, use_arrow=USE_ARROW
+        )
+        if len(gdf) > 0:
+            return gdf
+    except (DataSourceError, DataLayerError, FieldError) as e:
+        print(f"   ⚠ Filtered read failed ({e}), reading full layer...")
+    
+    return gpd.read_file(path)
+
+
+def to_target_crs(gdf):
+    """
+    Return gdf in TARGET_CRS, skipping the reprojection if it is already there.
+    
+    ALKIS data ships in EPSG:25832, so the common path avoids a no-op
+    per-vertex transform. Data without a CRS is assumed to be in it.
+    """
+    if gdf.crs is None:
+        return gdf.set_crs(TARGET_CRS)
+    if gdf.crs.equals(TARGET_CRS, ignore_axis_order=True):
+        return gdf
+    return gdf.to_crs(TARGET_CRS)
+
+
+@contextmanager
+def _temporary_env(options):
+    """Set environment variables (read by GDAL as config options) for a block."""
+    previous = {key: os.environ.get(key) for key in options}
+    os.environ.update(options)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def write_gpkg(gdf, output_path):
+    """
+    Write a GeoDataFrame to GeoPackage in one bulk pyogrio write.
+    
+    SQLite durability settings are relaxed only for the duration of the
+    write, and the R-tree spatial index is built as part of it. Uses Arrow
+    to hand the whole table to GDAL when pyarrow is installed.
+    """
+    with _temporary_env(GPKG_WRITE_OPTIONS):
+        gdf.to_file(
+            output_path,
+            driver="GPKG",
+            engine="pyogrio",
+            use_arrow=USE_ARROW,
+            layer_options={"SPATIAL_INDEX": "YES"},
+        )
 
 
 def download_bayern_boundaries():
@@ -133,10 +578,10 @@ def download_bayern_boundaries():
         print(f"   ✓ Found existing shapefile: {existing_shp}")
         print(f"   Converting to GeoPackage...")
         try:
-            gdf = gpd.read_file(existing_shp)
+            gdf = read_boundaries(existing_shp)
             # Filter to Landkreise if needed (check for Kreis-level data)
             # Convert to target CRS and save
-            gdf.to_crs(25832).to_file(output_gpkg, driver="GPKG")
+            write_gpkg(to_target_crs(gdf), output_gpkg)
             print(f"   ✓ Converted and saved to: {output_gpkg}")
             return output_gpkg
         except Exception as e:
@@ -162,13 +607,22 @@ def download_bayern_boundaries():
         # "https://geodaten.bayern.de/opengeodata/wfs?service=WFS&version=2.0.0&request=GetFeature&typeName=verwaltung:landkreise&outputFormat=application/json",
     ]
     
-    zip_path = DATA_RAW / "bayern_boundaries.zip"
+    extract_dir = DATA_RAW / "boundaries_extracted"
+    
+    # Probe all candidates at once so only an existing URL is downloaded
+    available_url = find_available_url(possible_urls)
+    if available_url:
+        print(f"   ✓ Found: {available_url.split('/')[-1]}")
+        candidate_urls = [available_url]
+    else:
+        # Server may not answer HEAD - fall back to trying each URL with GET
+        candidate_urls = possible_urls
     
-    # Try to download
+    # Try to download (ZIP is extracted straight from memory)
     downloaded = False
-    for i, url in enumerate(possible_urls, 1):
-        print(f"   Attempt {i}/{len(possible_urls)}: {url.split('/')[-1]}")
-        result = download_file(url, zip_path, f"   Trying", verbose=True)
+    for i, url in enumerate(candidate_urls, 1):
+        print(f"   Attempt {i}/{len(candidate_urls)}: {url.split('/')[-1]}")
+        result = download_and_extract_zip(url, extract_dir, f"   Trying", verbose=True)
         if result:
             downloaded = True
             break
@@ -187,10 +641,6 @@ def download_bayern_boundaries():
         print("   - Filter to Bayern (AGS starting with '09')")
         return None
     
-    # Extract and convert
-    extract_dir = DATA_RAW / "boundaries_extracted"
-    extract_zip(zip_path, extract_dir, remove_zip=True)
-    
     # Find shapefile or gpkg in extracted files
     shp_files = list(extract_dir.rglob("*.shp"))
     gpkg_files = list(extract_dir.rglob("*.gpkg"))
@@ -202,7 +652,7 @@ def download_bayern_boundaries():
     elif shp_files:
         source_file = shp_files[0]
         print(f"   Converting {source_file.name} to GeoPackage...")
-        gdf = gpd.read_file(source_file)
+        gdf = read_boundaries(source_file)
         # Filter to Landkreise (Kreise) if needed
         # Common column names: "KREISE", "KREIS", "AGS", "RS"
         if "KREISE" in gdf.columns or "KREIS" in gdf.columns:
@@ -212,7 +662,7 @@ def download_bayern_boundaries():
             # Might be Gemeinde level - user may need to aggregate
             print("   ⚠ WARNING: Data appears to be Gemeinde-level, not Kreis-level")
         
-        gdf.to_crs(25832).to_file(output_gpkg, driver="GPKG")
+        write_gpkg(to_target_crs(gdf), output_gpkg)
         print(f"   ✓ Converted and saved to: {output_gpkg}")
     else:
         print(f"   ✗ Could not find shapefile or GeoPackage in extracted files")
@@ -274,9 +724,11 @@ def download_inkar_data():
     import pandas as pd
     
     # Example: Create template with Bayern Kreis codes (09xxx)
+    n_codes = 99
+    codes = np.char.add("09", np.char.zfill(np.arange(1, n_codes + 1).astype("U3"), 3))
     template_data = {
-        "AGS5": [f"09{i:03d}" for i in range(1, 100)],  # Example codes
-        "commute_value": [0.0] * 99  # Placeholder values
+        "AGS5": codes,  # Example codes
+        "commute_value": np.zeros(n_codes, dtype=np.float32)  # Placeholder values
     }
     template_df = pd.DataFrame(template_data)
     template_df.to_csv(output_csv, index=False)
@@ -287,11 +739,174 @@ def download_inkar_data():
     return output_csv
 
 
-def download_copernicus_dem(skip=False):
+def quantize_dem_tile(tile_path):
+    """
+    Rewrite a float32 DEM tile in place as int16 metres.
+    
+    Elevations are rounded to 1 m, which is ample for a hillshade, and
+    stored with DEFLATE + predictor 2 in 256x256 tiles. This halves the
+    bytes on disk and the data read by 02_hillshade.py. If the rewrite
+    fails, the float32 original is kept.
+    """
+    tile_path = Path(tile_path)
+    # Not *.tif, so an interrupted rewrite is never picked up as a DEM tile
+    tmp_path = tile_path.with_name(tile_path.name + ".i16.part")
+    
+    try:
+        with rasterio.open(tile_path) as src:
+            if src.dtypes[0] == "int16":
+                return tile_path
+            dem = src.read(1, masked=True)
+            profile = src.profile.copy()
+        
+        nodata = np.iinfo(np.int16).min
+        quantized = np.clip(np.rint(dem), nodata + 1, np.iinfo(np.int16).max)
+        quantized = quantized.astype(np.int16).filled(nodata)
+        
+        profile.update(
+            driver="GTiff",
+            dtype=rasterio.int16,
+            nodata=nodata if profile.get("nodata") is not None else None,
+            compress="deflate",
+            predictor=2,
+            tiled=True,
+            blockxsize=256,
+            blockysize=256,
+            BIGTIFF="IF_SAFER",
+        )
+        with rasterio.open(tmp_path, "w", **profile) as dst:
+            dst.write(quantized, 1)
+        os.replace(tmp_path, tile_path)
+    except (rasterio.errors.RasterioError, OSError) as e:
+        print(f"   ⚠ Could not quantize {tile_path.name} ({e}), keeping float32")
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return tile_path
+
+
+def fetch_dem_tile(url, tile_file, description="Downloading", verbose=False, quantize=False):
+    """
+    Download one DEM tile, optionally quantize it, and prewarm the page cache.
+    
+    Returns the tile path on success, None otherwise.
+    """
+    result = download_file_ranged(url, tile_file, description, verbose)
+    if result:
+        if quantize:
+            quantize_dem_tile(result)
+        prewarm_page_cache(result)
+    return result
+
+
+def _open_part(part_path, size):
+    """Open a download's .part file for writing and preallocate size bytes."""
+    f = open(part_path, "wb", buffering=CHUNK_SIZE)
+    _preallocate(f.fileno(), size)
+    return f
+
+
+def _close_part(f):
+    """Trim a .part file to the bytes actually written and close it."""
+    try:
+        f.truncate()
+    finally:
+        f.close()
+
+
+async def _fetch_dem_tile_async(session, url, tile_file, quantize=False):
+    """
+    Async counterpart of fetch_dem_tile() for use with an aiohttp session.
+    
+    5xx responses, timeouts and connection errors are retried with the same
+    backoff as _SESSION. File writes and post-processing run in the default
+    executor, so the event loop only handles network I/O.
+    
+    Returns the tile path on success, None otherwise.
+    """
+    loop = asyncio.get_running_loop()
+    part_path = _part_path(tile_file)
+    
+    for attempt in range(HTTP_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(HTTP_BACKOFF * 2 ** (attempt - 1))
+        f = None
+        try:
+            async with session.get(url) as response:
+                if response.status in RETRY_STATUSES:
+                    continue
+                if response.status != 200:
+                    return None
+                f = await loop.run_in_executor(
+                    None, _open_part, part_path, response.content_length
+                )
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    await loop.run_in_executor(None, f.write, chunk)
+                await loop.run_in_executor(None, _close_part, f)
+                f = None
+                await loop.run_in_executor(
+                    None, _finish_download, part_path, tile_file, response.headers.get("ETag")
+                )
+                break
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError):
+            continue
+        finally:
+            if f is not None:
+                f.close()
+            if part_path.exists():
+                part_path.unlink()
+    else:
+        return None
+    
+    # CPU/disk-bound post-processing runs off the event loop
+    if quantize:
+        await loop.run_in_executor(None, quantize_dem_tile, tile_file)
+    await loop.run_in_executor(None, prewarm_page_cache, tile_file)
+    return tile_file
+
+
+async def fetch_dem_tiles_async(jobs, quantize=False, bar=None):
+    """
+    Download many DEM tiles concurrently on a single event loop.
+    
+    A failing tile yields None (like fetch_dem_tile) and never cancels the
+    other downloads.
+    
+    Parameters:
+    -----------
+    jobs : list of (url, Path)
+        Tiles to fetch
+    quantize : bool
+        Store tiles as int16 (see quantize_dem_tile)
+    bar : tqdm, optional
+        Progress bar advanced once per finished tile
+    
+    Returns:
+    --------
+    list : tile path or None for each job, in order
+    """
+    connector = aiohttp.TCPConnector(limit=32, limit_per_host=16)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=60, sock_read=60)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def run(url, tile_file):
+            try:
+                return await _fetch_dem_tile_async(session, url, tile_file, quantize)
+            except Exception as e:
+                print(f"   ⚠ {tile_file.name} failed: {e}")
+                return None
+            finally:
+                if bar is not None:
+                    bar.update(1)
+        
+        return await asyncio.gather(*(run(url, tile_file) for url, tile_file in jobs))
+
+
+def download_copernicus_dem(skip=False, quantize=False):
     """
     Download Copernicus DEM tiles covering Bavaria.
     
-    Tries multiple sources in order of preference.
+    Tries multiple sources in order of preference. With quantize=True,
+    tiles are stored as int16 metres instead of float32.
     """
     print("\n" + "=" * 60)
     print("3. Downloading Copernicus DEM")
@@ -342,40 +957,55 @@ def download_copernicus_dem(skip=False):
         
         for tile in tiles[:3]:  # Try first 3 tiles to test source
             tile_file = DEM_DIR / f"{tile}.tif"
+            url = f"{source['base_url']}/{source['pattern'].format(tile=tile)}"
             
-            if tile_file.exists():
+            if is_up_to_date(url, tile_file):
                 print(f"   ✓ {tile}.tif already exists")
                 downloaded_count += 1
                 source_downloaded += 1
                 continue
             
-                url = f"{source['base_url']}/{source['pattern'].format(tile=tile)}"
-                result = download_file(url, tile_file, f"   Testing {tile}", verbose=True)
+            # Failed attempts leave no file behind (written to .part first)
+            result = fetch_dem_tile(url, tile_file, f"   Testing {tile}", True, quantize)
             
             if result:
                 downloaded_count += 1
                 source_downloaded += 1
                 source_worked = True
-            else:
-                # Remove failed download attempt
-                if tile_file.exists():
-                    tile_file.unlink()
+        
+        # All probe tiles cached from an earlier run - resume with this source
+        if not source_worked and source_downloaded == len(tiles[:3]):
+            source_worked = True
         
         if source_worked:
             print(f"   ✓ Source works! Downloading remaining tiles...")
-            # Download remaining tiles from working source
-            for tile in tiles[3:]:
-                tile_file = DEM_DIR / f"{tile}.tif"
-                
-                if tile_file.exists():
-                    downloaded_count += 1
-                    continue
-                
-                url = f"{source['base_url']}/{source['pattern'].format(tile=tile)}"
-                result = download_file(url, tile_file, f"   {tile}", verbose=False)
-                
-                if result:
-                    downloaded_count += 1
+            # Download remaining tiles from working source in parallel
+            candidates = [
+                (f"{source['base_url']}/{source['pattern'].format(tile=tile)}", DEM_DIR / f"{tile}.tif")
+                for tile in tiles[3:]
+            ]
+            # ETag checks are one HEAD each - run them concurrently too
+            with ThreadPoolExecutor(max_workers=DEM_WORKERS) as executor:
+                current = list(executor.map(lambda job: is_up_to_date(*job), candidates))
+            downloaded_count += sum(current)
+            jobs = [job for job, is_current in zip(candidates, current) if not is_current]
+            
+            with tqdm(desc="   DEM tiles", total=len(jobs), unit="tile") as bar:
+                if aiohttp is not None:
+                    # One event loop drives all downloads - no per-tile threads
+                    results = asyncio.run(fetch_dem_tiles_async(jobs, quantize, bar))
+                else:
+                    with ThreadPoolExecutor(max_workers=DEM_WORKERS) as executor:
+                        futures = [
+                            executor.submit(fetch_dem_tile, url, tile_file, f"   {tile_file.stem}", False, quantize)
+                            for url, tile_file in jobs
+                        ]
+                        results = []
+                        for future in as_completed(futures):
+                            results.append(future.result())
+                            bar.update(1)
+            
+            downloaded_count += sum(1 for result in results if result)
     
     print(f"\n   ✓ Downloaded {downloaded_count}/{len(tiles)} tiles")
     
@@ -412,6 +1042,11 @@ def main():
         action="store_true",
         help="Skip INKAR download (use manual CSV)"
     )
+    parser.add_argument(
+        "--quantize",
+        action="store_true",
+        help="Store DEM tiles as int16 metres instead of float32 (halves disk use)"
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -438,7 +1073,7 @@ def main():
             print(f"   ⚠ Please create: {commuting}")
     
     # Download DEM
-    dem_dir = download_copernicus_dem(skip=args.skip_dem)
+    dem_dir = download_copernicus_dem(skip=args.skip_dem, quantize=args.quantize)
     
     # Summary
     print("\n" + "=" * 60)
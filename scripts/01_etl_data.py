@@ -9,16 +9,38 @@ Usage:
     python scripts/01_etl_data.py
 """
 
+import hashlib
+import json
 import math
+import os
 import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import geopandas as gpd
+from shapely import STRtree, get_coordinates
 from shapely.geometry import Point
 import numpy as np
 from tqdm import tqdm
 
+# Arrow-based vector I/O through the pyogrio engine when pyarrow is installed
+# (the use_arrow keyword needs pyogrio>=0.8.0, the pinned minimum)
+try:
+    import pyarrow  # noqa: F401
+    USE_ARROW = True
+except ImportError:
+    USE_ARROW = False
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
 # Add project root to path for imports if needed
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
@@ -34,37 +56,96 @@ YEAR = 2023  # Options: 2019, 2020, 2021, 2022, 2023
 # Note: To match commuting data year, change this to the desired year
 DATA_RAW = PROJECT_ROOT / "data_raw"
 DATA_PROCESSED = PROJECT_ROOT / "data_processed"
+# Cache for UBA catalog endpoints (components, networks, stations) that rarely change
+UBA_CACHE_DIR = DATA_RAW / ".uba_cache"
+UBA_CACHE_TTL = 7 * 24 * 3600  # seconds
+# Placeholder cells in the commuting CSV (no value / suppressed)
+PENDLER_NA_VALUES = ["-", ".", "x", "/"]
 
 # Ensure directories exist
 DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
 
+# Shared HTTP session: one keep-alive connection for all UBA API calls,
+# with backoff retries for rate limiting and transient server errors
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
+# requests already asks for gzip-compressed responses by default
+_SESSION.headers.update({"User-Agent": "etl-commute-air/1.0"})
+# Default query parameters, merged by requests into every call's params
+_SESSION.params = {"lang": "en"}
+
 
 def _as_row(obj):
     """UBA API sometimes returns arrays, sometimes dicts keyed by '0','1',..."""
     if isinstance(obj, list):
         return obj
     if isinstance(obj, dict):
-        # keys are like "0","1",...
-        return [obj[str(i)] for i in range(len(obj))]
+        # keys are like "0","1",... in order (JSON object order is preserved)
+        return list(obj.values())
     raise TypeError(f"Unexpected type: {type(obj)}")
 
 
+def _frame_from_rows(rows, columns):
+    """
+    Build a DataFrame column-wise from a list of equal-length rows.
+    
+    Transposing once with zip() lets pandas create each column directly
+    instead of inferring dtypes row by row.
+    """
+    rows = list(rows)
+    if (not rows or len(set(columns)) != len(columns)
+            or any(len(r) != len(columns) for r in rows)):
+        # Empty, duplicate names or ragged rows - let pandas handle/report it
+        return pd.DataFrame(rows, columns=columns)
+    return pd.DataFrame(dict(zip(columns, zip(*rows))), columns=columns)
+
+
 def fetch_indexed(endpoint, params=None):
     """Fetch data from UBA API endpoint."""
-    url = f"{UBA_BASE}{endpoint}"
-    params = params or {}
-    params.setdefault("lang", "en")
-    
     print(f"Fetching: {endpoint}")
-    r = requests.get(url, params=params, timeout=60)
+    r = _SESSION.get(f"{UBA_BASE}{endpoint}", params=params, timeout=60)
     r.raise_for_status()
     j = r.json()
     return j
 
 
+def fetch_cached(endpoint, params=None, ttl=UBA_CACHE_TTL):
+    """
+    Fetch from UBA API endpoint, reusing an on-disk JSON copy younger than ttl seconds.
+    
+    Intended for catalog endpoints whose content is effectively static
+    between ETL runs.
+    """
+    params = dict(params or {})
+    key = json.dumps([endpoint, sorted(params.items())], default=str)
+    cache_file = UBA_CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+    
+    if cache_file.exists() and time.time() - cache_file.stat().st_mtime < ttl:
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                print(f"Cached: {endpoint}")
+                return json.load(f)
+        except (OSError, ValueError):
+            pass  # Unreadable cache entry - fetch again
+    
+    j = fetch_indexed(endpoint, params=params)
+    
+    # Write atomically so an interrupted run never leaves a truncated entry
+    UBA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=UBA_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(j, f)
+    os.replace(tmp_name, cache_file)
+    return j
+
+
 def get_component_id(code: str) -> int:
     """Get component ID from code (e.g., 'NO2', 'PM10')."""
-    j = fetch_indexed("/components/json", params={})
+    j = fetch_cached("/components/json", params={})
     
     # Components endpoint returns data keyed by numeric IDs at top level
     # Structure: {"indices": [...], "1": [id, code, ...], "2": [...], ...}
@@ -84,7 +165,7 @@ def get_component_id(code: str) -> int:
     
     # Try with index parameter as fallback
     try:
-        j_indexed = fetch_indexed("/components/json", params={"index": "code"})
+        j_indexed = fetch_cached("/components/json", params={"index": "code"})
         data_indexed = j_indexed.get("data", {})
         if code in data_indexed:
             row = _as_row(data_indexed[code])
@@ -97,7 +178,7 @@ def get_component_id(code: str) -> int:
 
 def get_network_id(code: str) -> int:
     """Get network ID from code (e.g., 'BY' for Bavaria)."""
-    j = fetch_indexed("/networks/json", params={"index": "code"})
+    j = fetch_cached("/networks/json", params={"index": "code"})
     data = j.get("data", {})
     if code in data:
         row = _as_row(data[code])
@@ -107,18 +188,15 @@ def get_network_id(code: str) -> int:
 
 def stations_df():
     """Fetch all stations from UBA API."""
-    j = fetch_indexed("/stations/json")
+    j = fetch_cached("/stations/json")
     idx = j.get("indices", [])
     data = j.get("data", {})
 
     # If it's dict keyed by station id -> row
     if isinstance(data, dict):
-        rows = []
-        for _, v in data.items():
-            rows.append(_as_row(v))
-        df = pd.DataFrame(rows, columns=idx)
+        df = _frame_from_rows((_as_row(v) for v in data.values()), idx)
     else:
-        df = pd.DataFrame([_as_row(v) for v in data], columns=idx)
+        df = _frame_from_rows((_as_row(v) for v in data), idx)
 
     return df
 
@@ -158,29 +236,72 @@ def annualbalances_df(component_id: int, year: int):
         
         # Ensure all rows have same length
         rows_padded = [r + [None] * (actual_cols - len(r)) if len(r) < actual_cols else r[:actual_cols] for r in rows]
-        df = pd.DataFrame(rows_padded, columns=col_names)
+        df = _frame_from_rows(rows_padded, col_names)
     elif isinstance(data, dict):
         # Fallback for dict format
-        rows = []
-        for key, value in data.items():
-            if key not in ["indices", "count"]:
-                rows.append(_as_row(value))
-        df = pd.DataFrame(rows, columns=idx)
+        rows = [
+            _as_row(value) for key, value in data.items()
+            if key not in ["indices", "count"]
+        ]
+        df = _frame_from_rows(rows, idx)
     else:
         df = pd.DataFrame(columns=idx)
     
     return df
 
 
-def idw_value(target_point, stations_gdf, value_col, k=5, max_km=80):
+def _ags5(codes):
+    """Normalize AGS/RS codes to 5-digit Kreis codes (first 5 characters, zero-padded)."""
+    return codes.astype("string").str.slice(0, 5).str.zfill(5)
+
+
+def _ags_int(codes):
+    """
+    Numeric view of 5-digit AGS codes for prefix tests by integer division.
+    
+    Leading zeros drop out ('09362' -> 9362), so state 09 is ``// 1000 == 9``
+    and Regierungsbezirk 093 is ``// 100 == 93``. Invalid codes become -1
+    and never match.
+    """
+    return pd.to_numeric(codes, errors="coerce").fillna(-1).to_numpy(dtype=np.int32)
+
+
+def read_pendler_csv(path):
+    """
+    Read the Gemeinde-level commuting CSV with numeric value columns.
+    
+    decimal="," parses German-format values ("12,49") while reading, but only
+    for columns where every cell is a number, so the source's placeholder
+    tokens are read as NaN. Value columns that still come back as strings
+    (an unknown placeholder) get the explicit comma-to-dot conversion.
+    """
+    # Row 0: headers, Row 1: years, Row 2+: data
+    # When we skip row 1, pandas uses row 0 as headers and row 1's values become column names
+    pendler = pd.read_csv(
+        path, sep=";", encoding="utf-8", skiprows=1, decimal=",",
+        na_values=PENDLER_NA_VALUES,
+    )
+    
+    # First 3 columns are Kennziffer, Raumeinheit, Aggregat
+    for col in pendler.columns[3:]:
+        if not pd.api.types.is_numeric_dtype(pendler[col]):
+            pendler[col] = pd.to_numeric(
+                pendler[col].astype(str).str.replace(",", "."),
+                errors="coerce"
+            )
+    
+    return pendler
+
+
+def idw_value(px, py, xy, vals, k=5, max_km=80):
     """
     Inverse Distance Weighting interpolation.
     
     Parameters:
     -----------
-    target_point : shapely Point in EPSG:25832 meters
-    stations_gdf : GeoDataFrame in same CRS with value_col numeric
-    value_col : column name with values to interpolate
+    px, py : target point coordinates in EPSG:25832 meters
+    xy : (n, 2) array of station coordinates in same CRS
+    vals : (n,) array of station values (no NaN)
     k : number of nearest stations to use
     max_km : maximum radius in kilometers
     
@@ -188,21 +309,25 @@ def idw_value(target_point, stations_gdf, value_col, k=5, max_km=80):
     --------
     float : interpolated value or NaN if no stations found
     """
-    stations_gdf = stations_gdf.dropna(subset=[value_col]).copy()
-    if len(stations_gdf) == 0:
+    if len(vals) == 0:
         return float("nan")
     
-    stations_gdf["dist_m"] = stations_gdf.geometry.distance(target_point)
-    stations_gdf = stations_gdf[stations_gdf["dist_m"] <= max_km * 1000]
+    dist_m = np.hypot(xy[:, 0] - px, xy[:, 1] - py)
+    within = dist_m <= max_km * 1000
     
-    if len(stations_gdf) == 0:
+    if not within.any():
         return float("nan")
     
-    stations_gdf = stations_gdf.nsmallest(k, "dist_m")
+    dist_m = dist_m[within]
+    values = vals[within]
+    if len(dist_m) > k:
+        nearest = np.argpartition(dist_m, k)[:k]
+        dist_m = dist_m[nearest]
+        values = values[nearest]
     
     # Avoid div by zero
-    w = 1.0 / (stations_gdf["dist_m"].clip(lower=1.0))
-    weighted_sum = (w * stations_gdf[value_col]).sum()
+    w = 1.0 / np.clip(dist_m, 1.0, None)
+    weighted_sum = (w * values).sum()
     weight_sum = w.sum()
     
     if weight_sum == 0:
@@ -211,34 +336,77 @@ def idw_value(target_point, stations_gdf, value_col, k=5, max_km=80):
     return float(weighted_sum / weight_sum)
 
 
+def idw_kdtree(targets, xy, vals, k=5, max_km=80):
+    """
+    Inverse Distance Weighting for many target points in one batch.
+    
+    Same weighting as idw_value(), but the k nearest stations for all
+    targets are found with a single KD-tree query instead of computing
+    every station distance per target.
+    
+    Parameters:
+    -----------
+    targets : (m, 2) array of target coordinates in EPSG:25832 meters
+    xy : (n, 2) array of station coordinates in same CRS
+    vals : (n,) array of station values (no NaN)
+    k : number of nearest stations to use
+    max_km : maximum radius in kilometers
+    
+    Returns:
+    --------
+    np.ndarray : interpolated value per target (NaN if no stations found)
+    """
+    if len(vals) == 0:
+        return np.full(len(targets), np.nan)
+    
+    tree = cKDTree(xy)
+    k = min(k, len(vals))
+    # nextafter keeps stations at exactly max_km, matching idw_value's "<="
+    dists, idxs = tree.query(
+        targets, k=k, distance_upper_bound=np.nextafter(max_km * 1000, np.inf)
+    )
+    dists = dists.reshape(len(targets), k)
+    idxs = idxs.reshape(len(targets), k)
+    
+    # Missing neighbours come back as inf distance / out-of-range index
+    found = np.isfinite(dists)
+    # Avoid div by zero
+    w = np.where(found, 1.0 / np.clip(dists, 1.0, None), 0.0)
+    neighbour_vals = vals[np.where(found, idxs, 0)]
+    
+    weight_sum = w.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(weight_sum > 0, (w * neighbour_vals).sum(axis=1) / weight_sum, np.nan)
+
+
 def classify_bivariate(sf_obj, x_col, y_col):
     """
     Classify into 3x3 bivariate categories using tertiles.
     
     Returns GeoDataFrame with x_bin, y_bin, and group columns.
     """
-    xq = sf_obj[x_col].quantile([0, 1/3, 2/3, 1.0], interpolation='linear')
-    yq = sf_obj[y_col].quantile([0, 1/3, 2/3, 1.0], interpolation='linear')
-    
-    def get_bin(val, quantiles):
-        if pd.isna(val):
-            return np.nan
-        if val <= quantiles.iloc[1]:
-            return 1  # low
-        elif val <= quantiles.iloc[2]:
-            return 2  # mid
-        else:
-            return 3  # high
+    # Tertile thresholds as plain floats (only the 1/3 and 2/3 cuts are used)
+    xq = sf_obj[x_col].quantile([1/3, 2/3], interpolation='linear').tolist()
+    yq = sf_obj[y_col].quantile([1/3, 2/3], interpolation='linear').tolist()
+    
+    def get_bin(values, thresholds):
+        values = values.to_numpy(dtype=float)
+        # 1 = low (<= 1/3 quantile), 2 = mid (<= 2/3 quantile), 3 = high
+        bins = np.searchsorted(thresholds, values, side="left") + 1
+        return np.where(np.isnan(values), np.nan, bins)
     
     sf_obj = sf_obj.copy()
-    sf_obj["x_bin"] = sf_obj[x_col].apply(lambda v: get_bin(v, xq))
-    sf_obj["y_bin"] = sf_obj[y_col].apply(lambda v: get_bin(v, yq))
-    sf_obj["group"] = sf_obj.apply(
-        lambda row: f"{int(row['y_bin'])}-{int(row['x_bin'])}" 
-        if not pd.isna(row['x_bin']) and not pd.isna(row['y_bin']) 
-        else None, 
-        axis=1
+    sf_obj["x_bin"] = get_bin(sf_obj[x_col], xq)
+    sf_obj["y_bin"] = get_bin(sf_obj[y_col], yq)
+    
+    valid = sf_obj["x_bin"].notna() & sf_obj["y_bin"].notna()
+    group = pd.Series(None, index=sf_obj.index, dtype=object)
+    group[valid] = (
+        sf_obj.loc[valid, "y_bin"].astype(int).astype(str)
+        + "-"
+        + sf_obj.loc[valid, "x_bin"].astype(int).astype(str)
     )
+    sf_obj["group"] = group
     
     return sf_obj
 
@@ -258,8 +426,8 @@ def main():
         existing_shp = DATA_RAW / "ALKIS-Vereinfacht" / "VerwaltungsEinheit.shp"
         if existing_shp.exists():
             print(f"   Found shapefile, converting to GeoPackage...")
-            gdf = gpd.read_file(existing_shp).to_crs(25832)
-            gdf.to_file(kreise_path, driver="GPKG")
+            gdf = gpd.read_file(existing_shp, engine="pyogrio", use_arrow=USE_ARROW).to_crs(25832)
+            gdf.to_file(kreise_path, driver="GPKG", engine="pyogrio", use_arrow=USE_ARROW)
             print(f"   ✓ Converted and saved to: {kreise_path}")
         else:
             print(f"ERROR: Administrative boundaries not found")
@@ -268,7 +436,7 @@ def main():
             print("Please download from: https://geodaten.bayern.de/opengeodata/OpenDataDetail.html?pn=verwaltung")
             sys.exit(1)
     
-    kreise = gpd.read_file(kreise_path).to_crs(25832)
+    kreise = gpd.read_file(kreise_path, engine="pyogrio", use_arrow=USE_ARROW).to_crs(25832)
     print(f"   Loaded {len(kreise)} administrative units")
     
     # Ensure AGS5 column exists (adjust column name as needed)
@@ -276,20 +444,20 @@ def main():
         # Try common alternatives - check for 'ags' or 'rs' columns
         if "ags" in kreise.columns:
             # Extract 5-digit Kreis code from 8-digit AGS (first 5 digits)
-            kreise["AGS5"] = kreise["ags"].astype(str).str[:5].str.zfill(5)
+            kreise["AGS5"] = _ags5(kreise["ags"])
             print(f"   Extracted AGS5 from 'ags' column (first 5 digits)")
         elif "rs" in kreise.columns:
             # RS might already be 5-digit or 8-digit
-            kreise["AGS5"] = kreise["rs"].astype(str).str[:5].str.zfill(5)
+            kreise["AGS5"] = _ags5(kreise["rs"])
             print(f"   Extracted AGS5 from 'rs' column (first 5 digits)")
         elif "AGS" in kreise.columns:
-            kreise["AGS5"] = kreise["AGS"].astype(str).str[:5].str.zfill(5)
+            kreise["AGS5"] = _ags5(kreise["AGS"])
             print(f"   Extracted AGS5 from 'AGS' column")
         else:
             # Try other common names
             for col in ["KREISE", "KREIS", "RS"]:
                 if col in kreise.columns:
-                    kreise["AGS5"] = kreise[col].astype(str).str[:5].str.zfill(5)
+                    kreise["AGS5"] = _ags5(kreise[col])
                     print(f"   Extracted AGS5 from '{col}' column")
                     break
             else:
@@ -298,10 +466,10 @@ def main():
                 print("Please check the boundaries file structure")
                 sys.exit(1)
     else:
-        kreise["AGS5"] = kreise["AGS5"].astype(str).str[:5].str.zfill(5)
+        kreise["AGS5"] = _ags5(kreise["AGS5"])
     
     # Filter to Bayern (AGS starting with '09') first
-    bayern_mask = kreise["AGS5"].str.startswith("09")
+    bayern_mask = (_ags_int(kreise["AGS5"]) // 1000) == 9
     if not bayern_mask.all():
         print(f"   Filtering to Bayern (codes starting with '09')...")
         kreise = kreise[bayern_mask].copy()
@@ -323,14 +491,13 @@ def main():
         else:
             # We have Gemeinde-level data - need to aggregate to unique AGS5
             print("   Gemeinde-level data detected - aggregating to unique Kreise...")
-            # Group by AGS5 and take first geometry (or dissolve if needed)
-            # For now, we'll keep unique AGS5 values
-            kreise_unique = kreise.drop_duplicates(subset=["AGS5"], keep="first").copy()
+            # Union all Gemeinde polygons per AGS5 so each Kreis keeps its full area
+            # (attributes taken from the first Gemeinde)
+            kreise_unique = kreise.dissolve(by="AGS5", aggfunc="first").reset_index()
             print(f"   Aggregated from {len(kreise)} Gemeinden to {len(kreise_unique)} unique Kreise")
             kreise = kreise_unique
     
-    # Ensure AGS5 is properly formatted
-    kreise["AGS5"] = kreise["AGS5"].astype(str).str.zfill(5)
+    # AGS5 is already normalized to 5 digits above (_ags5)
     
     # --- Load commuting data ---
     print("\n2. Loading commuting indicator...")
@@ -348,9 +515,7 @@ def main():
         print("   Aggregating from Gemeinde (8-digit) to Kreis (5-digit)...")
         
         # Read with semicolon separator - skip row 1 which contains years
-        # Row 0: headers, Row 1: years, Row 2+: data
-        # When we skip row 1, pandas uses row 0 as headers and row 1's values become column names
-        pendler = pd.read_csv(pendler_path, sep=";", encoding="utf-8", skiprows=1)
+        pendler = read_pendler_csv(pendler_path)
         
         # After skiprows=1, columns should be: Unnamed:0, Unnamed:1, Unnamed:2, 2019, 2020, 2021, 2022, 2023
         # Rename first 3 columns properly
@@ -380,26 +545,24 @@ def main():
         # Extract Kennziffer (AGS code) - first column
         # Handle both float (9161000.0) and string ("09161000") formats
         ags_col = pendler.columns[0]
-        pendler["AGS8"] = pendler[ags_col].astype(str).str.strip('"').str.replace('.0', '').str.zfill(8)
+        pendler["AGS8"] = (
+            pendler[ags_col].astype("string")
+            .str.extract(r'"?(\d+)(?:\.0)?"?', expand=False)
+            .str.zfill(8)
+        )
         
         # Extract Kreis code (first 5 digits)
-        pendler["AGS5"] = pendler["AGS8"].str[:5]
+        pendler["AGS5"] = pendler["AGS8"].str.slice(0, 5)
         
-        # Convert value column (German format: "12,49" -> 12.49)
+        # Value columns are already numeric (read_pendler_csv); placeholders are NaN
         if year_col:
-            pendler["commute_value"] = pd.to_numeric(
-                pendler[year_col].astype(str).str.replace(",", "."),
-                errors="coerce"
-            )
+            pendler["commute_value"] = pd.to_numeric(pendler[year_col], errors="coerce")
         else:
             print("   WARNING: Could not identify year column, using first numeric column")
             # Try to find first numeric column
             for col in pendler.columns[3:]:
                 try:
-                    pendler["commute_value"] = pd.to_numeric(
-                        pendler[col].astype(str).str.replace(",", "."),
-                        errors="coerce"
-                    )
+                    pendler["commute_value"] = pd.to_numeric(pendler[col], errors="coerce")
                     break
                 except:
                     continue
@@ -423,13 +586,24 @@ def main():
     # --- Fetch UBA data ---
     print("\n3. Fetching UBA air quality data...")
     try:
-        NO2_ID = get_component_id("NO2")
-        print(f"   NO₂ component ID: {NO2_ID}")
-        
-        BY_ID = get_network_id("BY")
+        # Endpoints are independent - overlap their network round trips
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            fut_component = executor.submit(get_component_id, "NO2")
+            fut_network = executor.submit(get_network_id, "BY")
+            fut_stations = executor.submit(stations_df)
+            
+            NO2_ID = fut_component.result()
+            print(f"   NO₂ component ID: {NO2_ID}")
+            
+            # Annual balances only need the component ID - in flight alongside
+            # the network/stations requests
+            fut_balances = executor.submit(annualbalances_df, NO2_ID, YEAR)
+        # Leaving the block waits for all fetches and always shuts the pool down
+        
+        BY_ID = fut_network.result()
         print(f"   Bavaria network ID: {BY_ID}")
         
-        st = stations_df()
+        st = fut_stations.result()
         print(f"   Fetched {len(st)} total stations")
         
         # Identify coordinate columns (exact names from API)
@@ -477,6 +651,22 @@ def main():
             print("ERROR: No stations found for Bavaria network")
             sys.exit(1)
         
+        # Identify station ID column in stations frame
+        st_id_col = None
+        for col in st_by.columns:
+            if "station" in col.lower() and "id" in col.lower() and "code" not in col.lower():
+                st_id_col = col
+                break
+        
+        if not st_id_col:
+            st_id_col = "station id"  # Default column name
+        
+        # Keep only the columns used downstream before reprojecting/merging
+        keep_cols = [st_id_col, lon_col, lat_col, network_col]
+        if network_code_col:
+            keep_cols.append(network_code_col)
+        st_by = st_by[[c for c in dict.fromkeys(keep_cols) if c in st_by.columns]].copy()
+        
         # Create GeoDataFrame
         stations = gpd.GeoDataFrame(
             st_by,
@@ -486,7 +676,7 @@ def main():
         
         # Fetch annual balances
         print(f"\n4. Fetching annual balances for {YEAR}...")
-        ab = annualbalances_df(NO2_ID, YEAR)
+        ab = fut_balances.result()
         print(f"   Fetched {len(ab)} annual balance records")
         
         # Identify station ID and value columns
@@ -517,16 +707,6 @@ def main():
         ab[station_id_col] = pd.to_numeric(ab[station_id_col], errors="coerce")
         ab[value_col] = pd.to_numeric(ab[value_col], errors="coerce")
         
-        # Identify station ID column in stations GeoDataFrame
-        st_id_col = None
-        for col in stations.columns:
-            if "station" in col.lower() and "id" in col.lower() and "code" not in col.lower():
-                st_id_col = col
-                break
-        
-        if not st_id_col:
-            st_id_col = "station id"  # Default column name
-        
         # Ensure station IDs are same type for merging
         ab[station_id_col] = pd.to_numeric(ab[station_id_col], errors="coerce")
         stations[st_id_col] = pd.to_numeric(stations[st_id_col], errors="coerce")
@@ -557,11 +737,13 @@ def main():
     # Station-in-polygon mean where possible
     stations_with_data = stations.dropna(subset=["no2_value"])
     if len(stations_with_data) > 0:
-        join = gpd.sjoin(
-            stations_with_data[["geometry", "no2_value"]],
-            kreise[["AGS5", "geometry"]],
-            predicate="within"
-        )
+        # Point-in-polygon via GEOS tree query: (station index, Kreis index) pairs
+        tree = STRtree(kreise.geometry.values)
+        station_idx, kreis_idx = tree.query(stations_with_data.geometry.values, predicate="within")
+        join = pd.DataFrame({
+            "AGS5": kreise["AGS5"].to_numpy()[kreis_idx],
+            "no2_value": stations_with_data["no2_value"].to_numpy()[station_idx],
+        })
         
         if len(join) > 0:
             no2_mean = join.groupby("AGS5")["no2_value"].mean().rename("no2_value").reset_index()
@@ -576,17 +758,56 @@ def main():
     
     # Fill gaps with IDW
     print("\n7. Interpolating missing values (IDW)...")
-    centroids = kreise.geometry.representative_point()
     mask_missing = kreise["no2_value"].isna()
     n_missing = mask_missing.sum()
     
     if n_missing > 0 and len(stations_with_data) > 0:
         print(f"   Interpolating {n_missing} missing values...")
-        for idx in tqdm(kreise[mask_missing].index, desc="   IDW interpolation"):
-            pt = centroids.loc[idx]
-            kreise.loc[idx, "no2_value"] = idw_value(
-                pt, stations_with_data, "no2_value", k=5, max_km=80
-            )
+        # Target points only for the units being interpolated. Centroids are
+        # closed-form; only concave units whose centroid falls outside the
+        # polygon need the (costlier) guaranteed interior point
+        missing_geom = kreise.geometry[mask_missing]
+        centroids = missing_geom.centroid
+        outside = ~missing_geom.contains(centroids)
+        if outside.any():
+            centroids.loc[outside] = missing_geom[outside].representative_point()
+        # get_coordinates() skips null/empty points; those units keep NaN
+        centroids = centroids[~(centroids.is_empty | centroids.isna())]
+        
+        # Station coordinates/values extracted once (stations_with_data has no NaN values),
+        # taken relative to the station mean
+        xy = get_coordinates(stations_with_data.geometry.values)
+        origin = xy.mean(axis=0)
+        xy = xy - origin
+        vals = stations_with_data["no2_value"].to_numpy(dtype=np.float64)
+        targets_xy = get_coordinates(centroids.values) - origin
+        
+        if cKDTree is not None:
+            # cKDTree works in float64 and would copy float32 input back up
+            results = idw_kdtree(targets_xy, xy, vals, k=5, max_km=80)
+        else:
+            # scipy not installed - fall back to per-unit distance computation,
+            # spread over threads (NumPy releases the GIL in the distance kernels).
+            # float32 halves memory traffic of the per-target distance pass; the
+            # origin shift keeps UTM magnitudes (~5e6 m) at sub-metre precision
+            xy = xy.astype(np.float32)
+            vals = vals.astype(np.float32)
+            targets_xy = targets_xy.astype(np.float32)
+            with ThreadPoolExecutor() as executor:
+                results = np.fromiter(
+                    tqdm(
+                        executor.map(
+                            lambda pt: idw_value(pt[0], pt[1], xy, vals, k=5, max_km=80),
+                            targets_xy,
+                        ),
+                        total=len(targets_xy),
+                        desc="   IDW interpolation",
+                    ),
+                    dtype=float,
+                    count=len(targets_xy),
+                )
+        # Export schema stays float64
+        kreise.loc[centroids.index, "no2_value"] = results.astype(np.float64)
         print(f"   {kreise['no2_value'].notna().sum()} units now have NO₂ values")
     else:
         print("   No interpolation needed")
@@ -598,8 +819,9 @@ def main():
     
     # --- Create subsets ---
     print("\n9. Creating geographic subsets...")
-    bayern = kreise[kreise["AGS5"].str.startswith("09")].copy()
-    oberpfalz = kreise[kreise["AGS5"].str.startswith("093")].copy()
+    ags_int = _ags_int(kreise["AGS5"])
+    bayern = kreise[(ags_int // 1000) == 9].copy()
+    oberpfalz = kreise[(ags_int // 100) == 93].copy()
     
     print(f"   Bayern: {len(bayern)} units")
     print(f"   Oberpfalz: {len(oberpfalz)} units")
@@ -609,14 +831,18 @@ def main():
     bayern.to_file(
         DATA_PROCESSED / "bayern_bivariate.gpkg",
         layer="bayern",
-        driver="GPKG"
+        driver="GPKG",
+        engine="pyogrio",
+        use_arrow=USE_ARROW,
     )
     print(f"   Exported: {DATA_PROCESSED / 'bayern_bivariate.gpkg'}")
     
     oberpfalz.to_file(
         DATA_PROCESSED / "oberpfalz_bivariate.gpkg",
         layer="oberpfalz",
-        driver="GPKG"
+        driver="GPKG",
+        engine="pyogrio",
+        use_arrow=USE_ARROW,
     )
     print(f"   Exported: {DATA_PROCESSED / 'oberpfalz_bivariate.gpkg'}")
     
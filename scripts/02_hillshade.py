@@ -8,14 +8,40 @@ Usage:
     python scripts/02_hillshade.py
 """
 
+import math
 import sys
 from pathlib import Path
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import rasterio
 from rasterio.warp import calculate_default_transform, reproject, Resampling
 from rasterio.crs import CRS
+from rasterio.windows import Window
 import numpy as np
 
+try:
+    from scipy import ndimage
+except ImportError:
+    ndimage = None
+
+try:
+    import numba
+    from numba import cuda
+except ImportError:
+    numba = None
+    cuda = None
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+try:
+    from osgeo import gdal
+    gdal.UseExceptions()
+except ImportError:
+    gdal = None
+
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_RAW = PROJECT_ROOT / "data_raw"
 DATA_PROCESSED = PROJECT_ROOT / "data_processed"
@@ -23,6 +49,297 @@ DEM_DIR = DATA_RAW / "copernicus_dem"
 
 DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
 
+# Horn (1981) 3x3 weights, as used by gdaldem, in separable form:
+# d/dcol (x) = [1, 2, 1] down the rows x [-1, 0, 1] across the columns,
+# d/drow (y) the same with the axes swapped
+HORN_SMOOTH = np.array([1, 2, 1], dtype=np.float32)
+HORN_DIFF = np.array([-1, 0, 1], dtype=np.float32)
+BLOCK_ROWS = 1024  # DEM rows per hillshade stripe
+# GeoTIFF creation options for GDAL-written outputs (tiled, compressed)
+GDAL_CREATION_OPTIONS = [
+    "TILED=YES",
+    "BLOCKXSIZE=512",
+    "BLOCKYSIZE=512",
+    "COMPRESS=DEFLATE",
+    "NUM_THREADS=ALL_CPUS",
+]
+GDAL_CACHE_MAX = 4 << 30  # bytes; raster block cache for in-process GDAL
+WARP_MEMORY_LIMIT = 2 << 30  # bytes; gdal.Warp working buffer
+# Multithreaded warping with a large working buffer (fewer block re-reads),
+# shared by every gdal.Warp call
+GDAL_WARP_OPTIONS = {
+    "multithread": True,
+    "warpOptions": ["NUM_THREADS=ALL_CPUS"],
+    "warpMemoryLimit": WARP_MEMORY_LIMIT,
+}
+
+if gdal is not None:
+    gdal.SetCacheMax(GDAL_CACHE_MAX)
+
+# Shade kernel for the Python hillshade, fastest available first:
+# numba CUDA (GPU) > numba (fused, JIT-compiled for the host CPU) > numexpr > numpy
+if cuda is not None and cuda.is_available():
+    SHADE_BACKEND = "cuda"
+elif numba is not None:
+    SHADE_BACKEND = "numba"
+elif numexpr is not None:
+    SHADE_BACKEND = "numexpr"
+else:
+    SHADE_BACKEND = "numpy"
+
+
+def _horn_gradients(padded, pixel_size_x, pixel_size_y):
+    """
+    Surface gradients with the Horn 3x3 kernel.
+    
+    The kernel is applied as two 1-D passes per axis (smooth, then
+    difference), via scipy.ndimage when installed and numpy slicing
+    otherwise.
+    
+    Parameters:
+    -----------
+    padded : 2D float32 array of (z-scaled) elevations with a 1-pixel border
+    pixel_size_x, pixel_size_y : Pixel size in the DEM's horizontal units
+    
+    Returns:
+    --------
+    tuple : (dx, dy) gradients along columns and rows, without the border
+    """
+    if ndimage is not None:
+        smooth = ndimage.correlate1d(padded, HORN_SMOOTH, axis=0, mode="nearest")
+        dx = ndimage.correlate1d(smooth, HORN_DIFF, axis=1, mode="nearest")
+        ndimage.correlate1d(padded, HORN_SMOOTH, axis=1, output=smooth, mode="nearest")
+        dy = ndimage.correlate1d(smooth, HORN_DIFF, axis=0, mode="nearest")
+        dx = dx[1:-1, 1:-1]
+        dy = dy[1:-1, 1:-1]
+    else:
+        p = padded
+        # Smooth down the rows (weight-2 centre added twice), then difference columns
+        smooth = np.add(p[:-2], p[2:])
+        smooth += p[1:-1]
+        smooth += p[1:-1]
+        dx = np.subtract(smooth[:, 2:], smooth[:, :-2])
+        # Smooth across the columns, then difference rows
+        smooth = np.add(p[:, :-2], p[:, 2:])
+        smooth += p[:, 1:-1]
+        smooth += p[:, 1:-1]
+        dy = np.subtract(smooth[2:], smooth[:-2])
+    
+    dx /= 8 * pixel_size_x
+    dy /= 8 * pixel_size_y
+    return dx, dy
+
+
+def _read_stripe(src, y0, rows):
+    """
+    Read DEM rows [y0, y0 + rows) with a 1-pixel border for the 3x3 stencil.
+    
+    The border comes from the neighbouring rows where they exist and
+    replicates the raster edge elsewhere, so stripes give the same result
+    as a single full-raster pass.
+    """
+    top = max(y0 - 1, 0)
+    bottom = min(y0 + rows + 1, src.height)
+    data = src.read(1, window=Window(0, top, src.width, bottom - top), out_dtype=np.float32)
+    return np.pad(
+        data,
+        ((1 - (y0 - top), 1 - (bottom - y0 - rows)), (1, 1)),
+        mode="edge",
+    )
+
+
+if numba is not None:
+    # error_model="numpy": division by zero yields inf/nan instead of raising,
+    # which removes the per-pixel check that would block vectorization
+    @numba.njit(parallel=True, fastmath=True, cache=True, error_model="numpy")
+    def _hillshade_horn(padded, dx_inv, dy_inv, sin_alt, cos_alt, cos_az, sin_az):
+        """
+        Fused Horn gradient + hillshade kernel.
+        
+        Computes each output pixel from its 3x3 window in one pass, so no
+        full-raster temporaries are allocated. Same math as the numpy path
+        in hillshade_python(). The input carries a 1-pixel border (see
+        np.pad(..., mode="edge")), so the inner loop has no bounds checks or
+        branches and LLVM can vectorize it for the host CPU (AVX2/AVX-512);
+        prange spreads the rows over numba's thread pool (OpenMP or TBB).
+        
+        Parameters:
+        -----------
+        padded : 2D float32 array of (z-scaled) elevations with a 1-pixel border
+        dx_inv, dy_inv : 1 / (8 * pixel size) along columns and rows
+        sin_alt, cos_alt : Sine/cosine of the light source altitude
+        cos_az, sin_az : Cosine/sine of the light source azimuth
+        
+        Returns:
+        --------
+        np.ndarray : uint8 hillshade (0-255) without the border
+        """
+        rows = padded.shape[0] - 2
+        cols = padded.shape[1] - 2
+        out = np.empty((rows, cols), dtype=np.uint8)
+        for i in numba.prange(rows):
+            top = padded[i]
+            mid = padded[i + 1]
+            bot = padded[i + 2]
+            for j in range(cols):
+                dzdx = (
+                    (top[j + 2] + 2 * mid[j + 2] + bot[j + 2])
+                    - (top[j] + 2 * mid[j] + bot[j])
+                ) * dx_inv
+                dzdy = (
+                    (bot[j] + 2 * bot[j + 1] + bot[j + 2])
+                    - (top[j] + 2 * top[j + 1] + top[j + 2])
+                ) * dy_inv
+                
+                cos_slope = 1 / math.sqrt(1 + dzdx * dzdx + dzdy * dzdy)
+                shade = (sin_alt + cos_alt * (cos_az * dzdy - sin_az * dzdx)) * cos_slope
+                
+                # Normalize to 0-255 (truncating, as astype(np.uint8) does)
+                out[i, j] = np.uint8(min(max((shade + 1) / 2 * 255, 0.0), 255.0))
+        return out
+
+
+if cuda is not None:
+    CUDA_BLOCK = (16, 16)  # threads per block (columns, rows)
+    
+    @cuda.jit
+    def _hillshade_horn_cuda(padded, out, dx_inv, dy_inv, sin_alt, cos_alt, cos_az, sin_az):
+        """
+        GPU version of _hillshade_horn(): one thread per output pixel.
+        
+        Same inputs and math; the result is written to the device array out.
+        """
+        j, i = cuda.grid(2)
+        if i >= out.shape[0] or j >= out.shape[1]:
+            return
+        
+        dzdx = (
+            (padded[i, j + 2] + 2 * padded[i + 1, j + 2] + padded[i + 2, j + 2])
+            - (padded[i, j] + 2 * padded[i + 1, j] + padded[i + 2, j])
+        ) * dx_inv
+        dzdy = (
+            (padded[i + 2, j] + 2 * padded[i + 2, j + 1] + padded[i + 2, j + 2])
+            - (padded[i, j] + 2 * padded[i, j + 1] + padded[i, j + 2])
+        ) * dy_inv
+        
+        cos_slope = 1 / math.sqrt(1 + dzdx * dzdx + dzdy * dzdy)
+        shade = (sin_alt + cos_alt * (cos_az * dzdy - sin_az * dzdx)) * cos_slope
+        
+        # Normalize to 0-255 (truncating on assignment, as astype(np.uint8) does)
+        out[i, j] = min(max((shade + 1) / 2 * 255, 0.0), 255.0)
+    
+    def _shade_stripe_cuda(padded, *kernel_args):
+        """Copy a bordered stripe to the GPU, shade it there and copy it back."""
+        rows = padded.shape[0] - 2
+        cols = padded.shape[1] - 2
+        d_padded = cuda.to_device(padded)
+        d_out = cuda.device_array((rows, cols), dtype=np.uint8)
+        grid = (
+            (cols + CUDA_BLOCK[0] - 1) // CUDA_BLOCK[0],
+            (rows + CUDA_BLOCK[1] - 1) // CUDA_BLOCK[1],
+        )
+        _hillshade_horn_cuda[grid, CUDA_BLOCK](d_padded, d_out, *kernel_args)
+        return d_out.copy_to_host()
+
+
+def _shade_stripe(padded, pixel_size_x, pixel_size_y, azimuth_rad, altitude_rad):
+    """
+    Hillshade for one bordered DEM stripe (see _read_stripe).
+    
+    Parameters:
+    -----------
+    padded : 2D float32 array of (z-scaled) elevations with a 1-pixel border
+    pixel_size_x, pixel_size_y : float32 pixel size (already multiplied by scale)
+    azimuth_rad, altitude_rad : float32 light source direction in radians
+    
+    Returns:
+    --------
+    np.ndarray : uint8 hillshade (0-255) for the stripe without the border
+    """
+    if SHADE_BACKEND in ("cuda", "numba"):
+        # Fused kernel: gradients, slope, aspect and shade in one pass
+        kernel_args = (
+            1.0 / (8 * pixel_size_x),
+            1.0 / (8 * pixel_size_y),
+            np.sin(altitude_rad),
+            np.cos(altitude_rad),
+            np.cos(azimuth_rad),
+            np.sin(azimuth_rad),
+        )
+        if SHADE_BACKEND == "cuda":
+            return _shade_stripe_cuda(padded, *kernel_args)
+        return _hillshade_horn(padded, *kernel_args)
+    
+    # Calculate gradients (Horn method, matching gdaldem)
+    dx, dy = _horn_gradients(padded, pixel_size_x, pixel_size_y)
+    
+    if SHADE_BACKEND == "numexpr":
+        # Whole shade expression (see below) as one fused, multithreaded pass
+        hillshade = numexpr.evaluate(
+            "((sin_alt + cos_alt * (cos_az * dy - sin_az * dx))"
+            " / sqrt(1 + dx * dx + dy * dy) + 1) * half",
+            local_dict={
+                "dx": dx,
+                "dy": dy,
+                "sin_alt": np.sin(altitude_rad),
+                "cos_alt": np.cos(altitude_rad),
+                "cos_az": np.cos(azimuth_rad),
+                "sin_az": np.sin(azimuth_rad),
+                "half": np.float32(127.5),
+            },
+        )
+        np.clip(hillshade, 0, 255, out=hillshade)
+        return hillshade.astype(np.uint8)
+    
+    # Everything below runs in place (out=) on dx, dy and one scratch
+    # buffer, so no further full-stripe temporaries are allocated
+    
+    # Calculate slope. cos/sin of slope = arctan(g) follow from the
+    # gradient magnitude: cos = 1/sqrt(1+g²), sin = g/sqrt(1+g²), so only
+    # sqrt(1+g²) = hypot(hypot(dx, dy), 1) is needed
+    denom = np.hypot(dx, dy)
+    np.hypot(denom, 1, out=denom)
+    
+    # Calculate hillshade. With aspect = arctan2(-dx, dy),
+    # cos(azimuth - aspect) = (cos(az)*dy - sin(az)*dx) / g, so the g in
+    # sin(slope) cancels and neither arctan2 nor a per-pixel cos is needed.
+    # hillshade = (sin(alt) + cos(alt)*(cos(az)*dy - sin(az)*dx)) / denom
+    hillshade = np.multiply(dy, np.cos(azimuth_rad), out=dy)
+    np.multiply(dx, np.sin(azimuth_rad), out=dx)
+    np.subtract(hillshade, dx, out=hillshade)
+    np.multiply(hillshade, np.cos(altitude_rad), out=hillshade)
+    np.add(hillshade, np.sin(altitude_rad), out=hillshade)
+    np.divide(hillshade, denom, out=hillshade)
+    
+    # Normalize to 0-255: (h + 1) / 2 * 255
+    np.add(hillshade, 1, out=hillshade)
+    np.multiply(hillshade, 127.5, out=hillshade)
+    np.clip(hillshade, 0, 255, out=hillshade)
+    return hillshade.astype(np.uint8)
+
+
+def _init_stripe_worker():
+    """Limit per-process threading; parallelism comes from the process pool."""
+    if numexpr is not None:
+        numexpr.set_num_threads(1)
+
+
+def _shade_stripe_from_path(dem_path, y0, rows, z_factor, shade_args):
+    """
+    Read and shade one stripe in a worker process.
+    
+    Opens the DEM by path, since dataset handles cannot be shared between
+    processes. shade_args are passed on to _shade_stripe().
+    
+    Returns:
+    --------
+    tuple : (y0, rows, uint8 hillshade tile)
+    """
+    with rasterio.open(dem_path) as src:
+        padded = _read_stripe(src, y0, rows)
+    padded *= np.float32(z_factor)
+    return y0, rows, _shade_stripe(padded, *shade_args)
+
 
 def hillshade_python(dem_path, output_path, z_factor=1.0, scale=1.0, azimuth=315, altitude=45):
     """
@@ -37,63 +354,112 @@ def hillshade_python(dem_path, output_path, z_factor=1.0, scale=1.0, azimuth=315
     azimuth : Light source azimuth (degrees, 0-360)
     altitude : Light source altitude (degrees, 0-90)
     """
-    print(f"Generating hillshade from {dem_path}...")
+    print(f"Generating hillshade from {dem_path} ({SHADE_BACKEND} kernel)...")
     
     with rasterio.open(dem_path) as src:
-        dem = src.read(1)
         profile = src.profile.copy()
         
-        # Convert to radians
-        azimuth_rad = np.deg2rad(azimuth)
-        altitude_rad = np.deg2rad(altitude)
+        # Convert to radians (float32 scalars keep all array math in float32)
+        azimuth_rad = np.float32(np.deg2rad(azimuth))
+        altitude_rad = np.float32(np.deg2rad(altitude))
         
         # Calculate pixel size
         if src.transform.a != 0:
-            pixel_size_x = abs(src.transform.a)
-            pixel_size_y = abs(src.transform.e)
+            pixel_size_x = np.float32(abs(src.transform.a) * scale)
+            pixel_size_y = np.float32(abs(src.transform.e) * scale)
         else:
             # Fallback: assume square pixels
-            pixel_size_x = pixel_size_y = 1.0
-        
-        # Calculate gradients
-        dy, dx = np.gradient(dem * z_factor)
-        dx = dx / (pixel_size_x * scale)
-        dy = dy / (pixel_size_y * scale)
+            pixel_size_x = pixel_size_y = np.float32(scale)
         
-        # Calculate slope and aspect
-        slope = np.arctan(np.sqrt(dx**2 + dy**2))
-        aspect = np.arctan2(-dx, dy)
-        
-        # Calculate hillshade
-        hillshade = np.sin(altitude_rad) * np.cos(slope) + \
-                   np.cos(altitude_rad) * np.sin(slope) * \
-                   np.cos(azimuth_rad - aspect)
-        
-        # Normalize to 0-255
-        hillshade = np.clip((hillshade + 1) / 2 * 255, 0, 255).astype(np.uint8)
-        
-        # Update profile
+        # Update profile: tiled + DEFLATE output (uint8 hillshade compresses
+        # well); 512-row tiles align with the BLOCK_ROWS stripe writes
         profile.update(
+            driver="GTiff",
             dtype=rasterio.uint8,
             nodata=None,
-            count=1
+            count=1,
+            tiled=True,
+            blockxsize=512,
+            blockysize=512,
+            compress="DEFLATE",
+            predictor=2,
+            zlevel=1,
+            num_threads="ALL_CPUS",
+            BIGTIFF="IF_SAFER",
         )
         
-        # Write output
+        shade_args = (pixel_size_x, pixel_size_y, azimuth_rad, altitude_rad)
+        stripes = [
+            (y0, min(BLOCK_ROWS, src.height - y0)) for y0 in range(0, src.height, BLOCK_ROWS)
+        ]
+        
+        # Process in stripes of BLOCK_ROWS rows so peak memory does not
+        # grow with the DEM size; each stripe is written as it is done
         with rasterio.open(output_path, 'w', **profile) as dst:
-            dst.write(hillshade, 1)
+            if SHADE_BACKEND in ("cuda", "numba") or len(stripes) == 1:
+                # The numba kernels already run on all cores / the GPU
+                for y0, rows in stripes:
+                    padded = _read_stripe(src, y0, rows)
+                    padded *= np.float32(z_factor)
+                    tile = _shade_stripe(padded, *shade_args)
+                    dst.write(tile, 1, window=Window(0, y0, src.width, rows))
+            else:
+                # numpy/numexpr path: one stripe per core, written in completion order
+                with ProcessPoolExecutor(initializer=_init_stripe_worker) as executor:
+                    futures = [
+                        executor.submit(
+                            _shade_stripe_from_path, dem_path, y0, rows, z_factor, shade_args
+                        )
+                        for y0, rows in stripes
+                    ]
+                    for future in as_completed(futures):
+                        y0, rows, tile = future.result()
+                        dst.write(tile, 1, window=Window(0, y0, src.width, rows))
     
     print(f"   Hillshade saved to: {output_path}")
 
 
-def hillshade_gdal(dem_path, output_path, z_factor=1.0, scale=1.0):
+def hillshade_gdal(dem_path, output_path, z_factor=1.0, scale=1.0, multidirectional=False):
     """
-    Generate hillshade using GDAL command-line tool.
+    Generate hillshade using GDAL.
     
-    This is faster and more robust than pure Python implementation.
+    Runs in-process via the GDAL Python bindings (gdal.DEMProcessing) when
+    installed, otherwise via the gdaldem command-line tool. Either is faster
+    and more robust than the pure Python implementation. Output is a tiled,
+    DEFLATE-compressed GeoTIFF (GDAL_CREATION_OPTIONS).
+    
+    Parameters:
+    -----------
+    dem_path : Path to input DEM
+    output_path : Path to output hillshade
+    z_factor : Vertical exaggeration
+    scale : Scale factor (1.0 for same units)
+    multidirectional : Combine shading from several light directions
+        (gdaldem -multidirectional) instead of a single azimuth
     """
     print(f"Generating hillshade using GDAL from {dem_path}...")
     
+    if gdal is not None:
+        try:
+            options = gdal.DEMProcessingOptions(
+                format="GTiff",
+                zFactor=z_factor,
+                scale=scale,
+                computeEdges=True,
+                multiDirectional=multidirectional,
+                creationOptions=GDAL_CREATION_OPTIONS,
+            )
+            ds = gdal.DEMProcessing(str(output_path), str(dem_path), "hillshade", options=options)
+        except RuntimeError as e:
+            print(f"   GDAL error: {e}")
+            return False
+        if ds is None:
+            print("   GDAL error: DEMProcessing returned no dataset")
+            return False
+        ds = None  # Close dataset to flush it to disk
+        print(f"   Hillshade saved to: {output_path}")
+        return True
+    
     cmd = [
         "gdaldem", "hillshade",
         str(dem_path),
@@ -102,6 +468,10 @@ def hillshade_gdal(dem_path, output_path, z_factor=1.0, scale=1.0):
         "-s", str(scale),
         "-compute_edges"
     ]
+    if multidirectional:
+        cmd.append("-multidirectional")
+    for option in GDAL_CREATION_OPTIONS:
+        cmd += ["-co", option]
     
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, check=True)
@@ -142,13 +512,108 @@ def clip_dem_to_bavaria(dem_path, boundary_path, output_path):
         return False
 
 
-def find_dem_files():
-    """Find DEM files in copernicus_dem directory."""
-    if not DEM_DIR.exists():
-        return []
+def hillshade_gdal_pipeline(dem_path, boundary_path, output_path, z_factor=1.0, scale=1.0):
+    """
+    Clip, reproject and shade the DEM in a single in-process GDAL pipeline.
     
-    dem_files = list(DEM_DIR.glob("*.tif")) + list(DEM_DIR.glob("*.TIF"))
-    return dem_files
+    The clip + reprojection is a warped VRT in GDAL's in-memory filesystem
+    (/vsimem/), so DEMProcessing pulls warped blocks on demand and no
+    intermediate GeoTIFF is written. Requires the GDAL Python bindings.
+    
+    Parameters:
+    -----------
+    dem_path : Path to input DEM
+    boundary_path : Cutline for the clip, or None to keep the full extent
+    output_path : Path to output hillshade
+    z_factor : Vertical exaggeration
+    scale : Scale factor (1.0 for same units)
+    
+    Returns:
+    --------
+    bool : True if the hillshade was written
+    """
+    vrt_path = "/vsimem/dem_bayern_25832.vrt"
+    clip_kwargs = {}
+    if boundary_path is not None:
+        clip_kwargs = {"cutlineDSName": str(boundary_path), "cropToCutline": True}
+    
+    try:
+        vrt = gdal.Warp(
+            vrt_path,
+            str(dem_path),
+            format="VRT",
+            dstSRS="EPSG:25832",
+            resampleAlg="bilinear",
+            **GDAL_WARP_OPTIONS,
+            **clip_kwargs,
+        )
+        if vrt is None:
+            print("   GDAL error: Warp returned no dataset")
+            return False
+        vrt = None  # Close so the VRT definition is written to /vsimem/
+        return hillshade_gdal(vrt_path, output_path, z_factor=z_factor, scale=scale)
+    except RuntimeError as e:
+        print(f"   GDAL error: {e}")
+        return False
+    finally:
+        if gdal.VSIStatL(vrt_path) is not None:
+            gdal.Unlink(vrt_path)
+
+
+def reproject_dem_gdal(dem_path, output_path):
+    """
+    Reproject the DEM to EPSG:25832 (float32) with a multithreaded gdal.Warp.
+    
+    Requires the GDAL Python bindings.
+    
+    Returns:
+    --------
+    bool : True if the reprojected DEM was written; False lets the caller
+        fall back to rasterio
+    """
+    try:
+        ds = gdal.Warp(
+            str(output_path),
+            str(dem_path),
+            dstSRS="EPSG:25832",
+            resampleAlg="bilinear",
+            outputType=gdal.GDT_Float32,
+            creationOptions=GDAL_CREATION_OPTIONS,
+            **GDAL_WARP_OPTIONS,
+        )
+    except RuntimeError as e:
+        print(f"   GDAL error: {e}")
+        ds = None
+    if ds is None:
+        print("   gdal.Warp failed, falling back to rasterio...")
+        Path(output_path).unlink(missing_ok=True)
+        return False
+    ds = None  # Close dataset to flush it to disk
+    return True
+
+
+def _print_summary(output_path):
+    """Print the completion banner."""
+    print("\n" + "=" * 60)
+    print("Hillshade Generation Complete!")
+    print("=" * 60)
+    print(f"\nOutput: {output_path}")
+
+
+def find_dem_files(dem_dir=DEM_DIR):
+    """
+    Find DEM files in copernicus_dem directory.
+    
+    Single directory scan with a case-insensitive .tif match (two globs
+    either miss or double-count files depending on the filesystem).
+    Returns a sorted tuple.
+    """
+    if not dem_dir.exists():
+        return ()
+    
+    return tuple(sorted(
+        p for p in dem_dir.iterdir() if p.is_file() and p.suffix.lower() == ".tif"
+    ))
 
 
 def main():
@@ -180,63 +645,83 @@ def main():
     # Check if we have boundary file for clipping
     boundary_path = DATA_RAW / "alkis_landkreise.gpkg"
     clipped_dem_path = DATA_PROCESSED / "dem_bayern_25832.tif"
+    output_path = DATA_PROCESSED / "hillshade_bayern.tif"
+    
+    if gdal is not None:
+        # Clip + reproject + hillshade without intermediate GeoTIFFs
+        print("\nClipping, reprojecting and generating hillshade in one GDAL pipeline...")
+        if not boundary_path.exists():
+            print("   Boundary file not found, using full DEM extent")
+        if hillshade_gdal_pipeline(
+            dem_path,
+            boundary_path if boundary_path.exists() else None,
+            output_path,
+            z_factor=1.0,
+            scale=1.0,
+        ):
+            _print_summary(output_path)
+            return
+        print("   Pipeline failed, falling back to step-by-step processing...")
     
+    clipped = False
     if boundary_path.exists():
         print(f"\nClipping DEM to Bavaria extent...")
-        clip_dem_to_bavaria(dem_path, boundary_path, clipped_dem_path)
-        if clipped_dem_path.exists():
+        clipped = clip_dem_to_bavaria(dem_path, boundary_path, clipped_dem_path)
+        if clipped:
             dem_path = clipped_dem_path
     else:
         print(f"\nBoundary file not found, using full DEM extent")
         print(f"  (Place boundaries at {boundary_path} for clipping)")
     
-    # Reproject to EPSG:25832 if needed
+    # Reproject to EPSG:25832 if needed (a successful clip already warped
+    # to EPSG:25832 via -t_srs, so there is nothing left to do)
     with rasterio.open(dem_path) as src:
-        if src.crs != CRS.from_epsg(25832):
+        if not clipped and src.crs != CRS.from_epsg(25832):
             print(f"\nReprojecting DEM to EPSG:25832...")
             reprojected_path = DATA_PROCESSED / "dem_bayern_25832.tif"
             
-            transform, width, height = calculate_default_transform(
-                src.crs, CRS.from_epsg(25832),
-                src.width, src.height,
-                *src.bounds
-            )
-            
-            profile = src.profile.copy()
-            profile.update(
-                crs=CRS.from_epsg(25832),
-                transform=transform,
-                width=width,
-                height=height
-            )
-            
-            with rasterio.open(reprojected_path, 'w', **profile) as dst:
-                reproject(
-                    source=rasterio.band(src, 1),
-                    destination=rasterio.band(dst, 1),
-                    src_transform=src.transform,
-                    src_crs=src.crs,
-                    dst_transform=transform,
-                    dst_crs=CRS.from_epsg(25832),
-                    resampling=Resampling.bilinear
+            if gdal is None or not reproject_dem_gdal(dem_path, reprojected_path):
+                transform, width, height = calculate_default_transform(
+                    src.crs, CRS.from_epsg(25832),
+                    src.width, src.height,
+                    *src.bounds
                 )
+                
+                profile = src.profile.copy()
+                # float32 output (and warp buffer); nodata carried over explicitly
+                profile.update(
+                    crs=CRS.from_epsg(25832),
+                    transform=transform,
+                    width=width,
+                    height=height,
+                    dtype="float32",
+                    nodata=src.nodata
+                )
+                
+                with rasterio.open(reprojected_path, 'w', **profile) as dst:
+                    reproject(
+                        source=rasterio.band(src, 1),
+                        destination=rasterio.band(dst, 1),
+                        src_transform=src.transform,
+                        src_crs=src.crs,
+                        dst_transform=transform,
+                        dst_crs=CRS.from_epsg(25832),
+                        src_nodata=src.nodata,
+                        dst_nodata=src.nodata,
+                        resampling=Resampling.bilinear
+                    )
             
             dem_path = reprojected_path
             print(f"   Reprojected DEM saved to: {dem_path}")
     
     # Generate hillshade
-    output_path = DATA_PROCESSED / "hillshade_bayern.tif"
-    
     print(f"\nGenerating hillshade...")
     # Try GDAL first (faster), fall back to Python
     if not hillshade_gdal(dem_path, output_path, z_factor=1.0, scale=1.0):
         print("   Using Python implementation...")
         hillshade_python(dem_path, output_path, z_factor=1.0, scale=1.0)
     
-    print("\n" + "=" * 60)
-    print("Hillshade Generation Complete!")
-    print("=" * 60)
-    print(f"\nOutput: {output_path}")
+    _print_summary(output_path)
 
 
 if __name__ == "__main__":
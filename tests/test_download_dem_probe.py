@@ -0,0 +1,81 @@
+"""
+Regression test for the DEM source probe in scripts/00_download_data.py.
+
+A source must only count as working when a probe tile was actually
+fetched, or when all probe tiles are already cached from an earlier run.
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+for _module in ("requests", "tqdm", "numpy", "geopandas", "rasterio", "pyogrio", "pyproj"):
+    pytest.importorskip(_module)
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "00_download_data.py"
+AWS_URL = "https://copernicus-dem-30m.s3.amazonaws.com"
+OPENTOPO_URL = "https://cloud.sdsc.edu/v1/AUTH_opentopography/Raster/COP30"
+N_TILES = 20  # 4 x 5 one-degree tiles over Bavaria
+N_PROBE = 3
+
+
+@pytest.fixture
+def dl(monkeypatch, tmp_path):
+    """Load the download script as a module, with DEM_DIR in a temp dir and no network."""
+    spec = importlib.util.spec_from_file_location("download_data", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    monkeypatch.setattr(module, "DEM_DIR", tmp_path)
+    monkeypatch.setattr(module, "aiohttp", None)  # thread pool path
+    # "Up to date" means the tile was cached by an earlier run
+    monkeypatch.setattr(module, "is_up_to_date", lambda url, path, *a, **kw: Path(path).exists())
+    return module
+
+
+def stub_fetch(monkeypatch, module, working_base_url):
+    """Replace fetch_dem_tile; only URLs under working_base_url succeed. Returns the call log."""
+    calls = []
+
+    def fetch_dem_tile(url, tile_file, description="Downloading", verbose=False, quantize=False):
+        calls.append(url)
+        if working_base_url is not None and url.startswith(working_base_url):
+            Path(tile_file).touch()
+            return tile_file
+        return None
+
+    monkeypatch.setattr(module, "fetch_dem_tile", fetch_dem_tile)
+    return calls
+
+
+def test_no_source_works_when_every_probe_fails(dl, monkeypatch):
+    calls = stub_fetch(monkeypatch, dl, working_base_url=None)
+
+    assert dl.download_copernicus_dem() is None
+    # Only the probe tiles of each source were tried - no bulk download
+    assert len(calls) == 2 * N_PROBE
+
+
+def test_source_works_only_after_a_successful_probe(dl, monkeypatch):
+    calls = stub_fetch(monkeypatch, dl, working_base_url=OPENTOPO_URL)
+
+    assert dl.download_copernicus_dem() == dl.DEM_DIR
+    aws_calls = [url for url in calls if url.startswith(AWS_URL)]
+    opentopo_calls = [url for url in calls if url.startswith(OPENTOPO_URL)]
+    # The failing first source is probed but never used for the remaining tiles
+    assert len(aws_calls) == N_PROBE
+    assert len(opentopo_calls) == N_TILES
+
+
+def test_source_works_when_all_probe_tiles_are_cached(dl, monkeypatch):
+    # Explicitly: a source counts as working without any probe fetch when
+    # all 3 probe tiles are already on disk from an earlier run
+    for tile in ("N47E009", "N47E010", "N47E011"):
+        (dl.DEM_DIR / f"{tile}.tif").touch()
+    calls = stub_fetch(monkeypatch, dl, working_base_url=AWS_URL)
+
+    assert dl.download_copernicus_dem() == dl.DEM_DIR
+    # No probe tile was fetched; the remaining tiles come from the first source
+    assert len(calls) == N_TILES - N_PROBE
+    assert all(url.startswith(AWS_URL) for url in calls)
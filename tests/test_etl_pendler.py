@@ -0,0 +1,59 @@
+"""
+Regression test for reading the commuting CSV in scripts/01_etl_data.py.
+
+A placeholder cell must become NaN without turning the rest of its
+column into NaN.
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+for _module in ("requests", "numpy", "pandas", "geopandas", "shapely", "tqdm"):
+    pytest.importorskip(_module)
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "01_etl_data.py"
+
+# Row 0: headers, Row 1: years, Row 2+: data (8-digit AGS, German decimals)
+PENDLER_CSV = """\
+Kennziffer;Raumeinheit;Aggregat;Pendler;Pendler;Pendler;Pendler;Pendler
+;;;2019;2020;2021;2022;2023
+09161000;Ingolstadt;Gemeinde;4,51;4,62;4,70;4,81;4,89
+09162000;München;Gemeinde;12,10;12,25;12,40;12,55;12,69
+09163000;Rosenheim;Gemeinde;-;.;-;.;-
+"""
+
+
+@pytest.fixture
+def etl():
+    """Load the ETL script as a module."""
+    spec = importlib.util.spec_from_file_location("etl_data", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_placeholder_rows_keep_numeric_values(etl, tmp_path):
+    path = tmp_path / "Pendler50KmoderMehr.csv"
+    path.write_text(PENDLER_CSV, encoding="utf-8")
+
+    pendler = etl.read_pendler_csv(path)
+
+    assert pendler["2023"].dtype.kind == "f"
+    values = pendler["2023"].tolist()
+    assert values[:2] == pytest.approx([4.89, 12.69])
+    assert values[2] != values[2]  # NaN
+
+
+def test_unknown_placeholder_falls_back_to_comma_conversion(etl, tmp_path):
+    path = tmp_path / "Pendler50KmoderMehr.csv"
+    path.write_text(PENDLER_CSV.replace("12,69", "k.A.").replace("-;.;-;.;-", "1;2;3;4;5,5"), encoding="utf-8")
+
+    pendler = etl.read_pendler_csv(path)
+
+    assert pendler["2023"].dtype.kind == "f"
+    values = pendler["2023"].tolist()
+    assert values[0] == pytest.approx(4.89)
+    assert values[1] != values[1]  # NaN
+    assert values[2] == pytest.approx(5.5)